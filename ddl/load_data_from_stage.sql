@@ -5,6 +5,9 @@
 -- File names, database, schema, stage, and table names are hardcoded.
 -- Process: TRUNCATE table, then INSERT all data from files (DELETE INSERT pattern).
 -- Logs all operations to EUROPEAN_CLUB_CUPS_LOAD_LOG table.
+--
+-- LOAD_MATCHES_FROM_FILES loads an explicit list of staged files instead and
+-- is used by the orchestrator to load each uploaded batch incrementally.
 -- ============================================================================
 
 USE DATABASE UCL_APUESTA_DB;
@@ -285,8 +288,124 @@ $$
     END;
 $$;
 
+-- ----------------------------------------------------------------------------
+-- Stored Procedure: LOAD_MATCHES_FROM_FILES
+-- ----------------------------------------------------------------------------
+-- Loads only the given staged files (e.g. the batch that was just uploaded),
+-- so the orchestrator can load a batch while later batches are still uploading.
+-- Rows of each file's competition (file name prefix, e.g. UCL_) are deleted
+-- before the COPY, keeping the DELETE INSERT pattern per competition.
+-- Returns the number of rows loaded.
+-- ----------------------------------------------------------------------------
+
+CREATE OR REPLACE PROCEDURE LOAD_MATCHES_FROM_FILES(FILES ARRAY)
+RETURNS INTEGER
+LANGUAGE SQL
+AS
+$$
+    DECLARE
+        v_file_list STRING;
+        v_copy_query_id STRING;
+        v_rows_loaded INTEGER DEFAULT 0;
+        v_error_message STRING;
+        
+    BEGIN
+        IF (ARRAY_SIZE(:FILES) = 0) THEN
+            RETURN 0;
+        END IF;
+        
+        -- Quoted, comma separated file list for the FILES clause
+        v_file_list := '''' || ARRAY_TO_STRING(:FILES, ''',''') || '''';
+        
+        -- Step 1: Delete the rows of the competitions being reloaded
+        DELETE FROM UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.EUROPEAN_CLUB_CUPS_MATCHES
+        WHERE COMPETITION IN (
+            SELECT DISTINCT SPLIT_PART(VALUE::STRING, '_', 1)
+            FROM TABLE(FLATTEN(INPUT => :FILES))
+        );
+        
+        -- Step 2: Load all files of the batch with a single COPY
+        BEGIN
+            EXECUTE IMMEDIATE 'COPY INTO UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.EUROPEAN_CLUB_CUPS_MATCHES (
+                MATCH_ID,
+                COMPETITION,
+                SEASON,
+                PHASE,
+                MATCH_DATE,
+                HOME_TEAM,
+                AWAY_TEAM,
+                HOME_GOALS,
+                AWAY_GOALS,
+                LOAD_DATETIME
+            )
+            FROM (
+                SELECT 
+                    $1 AS MATCH_ID,
+                    $2 AS COMPETITION,
+                    $3 AS SEASON,
+                    $4 AS PHASE,
+                    $5::DATE AS MATCH_DATE,
+                    $6 AS HOME_TEAM,
+                    $7 AS AWAY_TEAM,
+                    $8::INTEGER AS HOME_GOALS,
+                    $9::INTEGER AS AWAY_GOALS,
+                    CURRENT_TIMESTAMP() AS LOAD_DATETIME
+                FROM @UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.EUROPEAN_CUPS_STAGE
+            )
+            FILE_FORMAT = (
+                TYPE = ''CSV'',
+                FIELD_DELIMITER = '','',
+                SKIP_HEADER = 1,
+                FIELD_OPTIONALLY_ENCLOSED_BY = ''"'',
+                TRIM_SPACE = TRUE,
+                ERROR_ON_COLUMN_COUNT_MISMATCH = FALSE,
+                REPLACE_INVALID_CHARACTERS = TRUE,
+                DATE_FORMAT = ''AUTO''
+            )
+            FILES = (' || v_file_list || ')
+            ON_ERROR = ''CONTINUE''
+            FORCE = TRUE';
+            
+            v_copy_query_id := LAST_QUERY_ID();
+            
+            -- Log one row per file with the row count reported by COPY
+            INSERT INTO UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.EUROPEAN_CLUB_CUPS_LOAD_LOG (
+                FILE_NAME,
+                ROWS_INSERTED,
+                STATUS
+            )
+            SELECT "file", "rows_loaded", "status"
+            FROM TABLE(RESULT_SCAN(:v_copy_query_id));
+            
+            SELECT COALESCE(SUM("rows_loaded"), 0) INTO :v_rows_loaded
+            FROM TABLE(RESULT_SCAN(:v_copy_query_id));
+            
+        EXCEPTION
+            WHEN OTHER THEN
+                v_error_message := SQLERRM;
+                
+                -- Log error for every file of the batch
+                INSERT INTO UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.EUROPEAN_CLUB_CUPS_LOAD_LOG (
+                    FILE_NAME,
+                    ROWS_INSERTED,
+                    STATUS
+                )
+                SELECT VALUE::STRING, 0, 'ERROR: ' || :v_error_message
+                FROM TABLE(FLATTEN(INPUT => :FILES));
+                
+                RAISE;
+        END;
+        
+        RETURN v_rows_loaded;
+        
+    END;
+$$;
+
 -- ----------------------------------------------------------------------------
 -- Grant Execute Permission
 -- ----------------------------------------------------------------------------
 GRANT USAGE ON PROCEDURE UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.LOAD_MATCHES_FROM_STAGE() 
 TO ROLE UCL_APUESTA_ROLE;
+
+GRANT USAGE ON PROCEDURE UCL_APUESTA_DB.UCL_APUESTA_SCHEMA.LOAD_MATCHES_FROM_FILES(ARRAY) 
+TO ROLE UCL_APUESTA_ROLE;
@@ -1405,7 +1405,13 @@ def print_matches_summary(matches: List[Dict]):
             print(f"... and {len(comp_matches) - 10} more matches")
 
 
-if __name__ == "__main__":
+def main() -> int:
+    """
+    Scrape all competitions, save the CSV files and print a summary.
+    
+    Returns:
+        Exit code (0 on success, 1 on a fatal error)
+    """
     try:
         print("=" * 80)
         print("European Club Cups Data Scraper")
@@ -1448,3 +1454,10 @@ if __name__ == "__main__":
         print(f"❌ Fatal Error: {e}")
         import traceback
         traceback.print_exc()
+        return 1
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
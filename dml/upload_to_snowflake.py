@@ -12,20 +12,82 @@ Note: This script is typically called by orchestrator.py, which handles the comp
 You can also use the functions directly if needed.
 """
 
+import io
 import json
 import os
+import re
 import sys
+import fnmatch
 import glob
+import gzip
 import tempfile
 import shutil
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
-import snowflake.connector
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    # Only for type checkers; the connector is imported when connecting
+    import snowflake.connector
 
 
 # Get the directory where this script is located
 SCRIPT_DIR = Path(__file__).parent.absolute()
 
+# Root level directories next to the script's folder
+ROOT_DIR = SCRIPT_DIR.parent
+DEFAULT_FILES_DIR = ROOT_DIR / "files"
+DEFAULT_CONFIG_PATH = ROOT_DIR / "PARAMS" / "snowflake_config.json"
+
+# Serializes output from upload worker threads so lines don't interleave
+_PRINT_LOCK = threading.Lock()
+
+
+
+class _StageListingCache:
+    """
+    Thread-safe cache of stage listings, so existence checks don't LIST the stage each time.
+    
+    Listings are kept per connection and stage path and expire after `ttl` seconds,
+    so files changed by another session are picked up eventually. Helpers that
+    modify a stage drop its entry via invalidate_stage_cache().
+    """
+    
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # {conn: {stage_path: (listed_at, {file_name: stage_file_path})}}
+        self._listings = weakref.WeakKeyDictionary()
+    
+    def get(self, conn, stage_path: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._listings.get(conn, {}).get(stage_path)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+    
+    def set(self, conn, stage_path: str, files: Dict[str, str]) -> None:
+        with self._lock:
+            self._listings.setdefault(conn, {})[stage_path] = (time.monotonic(), files)
+    
+    def invalidate(self, conn, stage_path: str) -> None:
+        with self._lock:
+            listings = self._listings.get(conn)
+            if listings is not None:
+                listings.pop(stage_path, None)
+
+
+_STAGE_LISTINGS = _StageListingCache()
+
+
+def _print(*args, **kwargs) -> None:
+    """Thread-safe print used by helpers that run on upload worker threads."""
+    with _PRINT_LOCK:
+        print(*args, **kwargs)
+
 
 def load_config(config_path: Optional[str] = None) -> dict:
     """
@@ -40,9 +102,7 @@ def load_config(config_path: Optional[str] = None) -> dict:
     # If no path provided, use default in PARAMS directory at root level
     if config_path is None:
         # Script is in DML directory, config is in PARAMS directory at same root level
-        # Get parent directory (root) and then go to PARAMS
-        root_dir = SCRIPT_DIR.parent
-        config_path = root_dir / "PARAMS" / "snowflake_config.json"
+        config_path = DEFAULT_CONFIG_PATH
     else:
         # If relative path, make it relative to script directory
         if not os.path.isabs(config_path):
@@ -58,95 +118,249 @@ def load_config(config_path: Optional[str] = None) -> dict:
         print(f"❌ Configuration file not found: {config_path}")
         print(f"   Looking in: {config_path.absolute()}")
         print(f"   Script directory: {SCRIPT_DIR}")
-        print(f"   Root directory: {SCRIPT_DIR.parent}")
-        print(f"   Expected PARAMS directory: {SCRIPT_DIR.parent / 'PARAMS'}")
+        print(f"   Root directory: {ROOT_DIR}")
+        print(f"   Expected PARAMS directory: {DEFAULT_CONFIG_PATH.parent}")
         sys.exit(1)
     except json.JSONDecodeError as e:
         print(f"❌ Error parsing configuration file: {e}")
         sys.exit(1)
 
 
-def find_csv_files(pattern: str = "*_matches.csv", search_dir: Optional[str] = None) -> List[str]:
+class CsvFile(NamedTuple):
+    """A CSV file found by find_csv_files, with the details taken from the directory scan."""
+    path: str  # Absolute path
+    name: str  # File name
+    size: int  # Size in bytes
+
+
+def find_csv_files(pattern: str = "*_matches.csv",
+                   search_dir: Optional[str] = None,
+                   sort: bool = True) -> List[CsvFile]:
     """
     Find all CSV files matching the pattern in the files directory at same level as script folder.
     
     Args:
         pattern: Glob pattern to match CSV files
         search_dir: Directory to search in (default: files directory at same level as script folder)
+        sort: Return the files sorted by path; pass False when the order doesn't matter
     
     Returns:
-        List of CSV file paths
+        List of CsvFile (absolute path, file name, size), so callers don't stat the files again
     """
     # Default to files directory at same level as script folder
     if search_dir is None:
         # files folder should be at the same level as the script's folder
         # e.g., if script is in DML/, files should be in files/ at same level
-        parent_dir = SCRIPT_DIR.parent
-        search_dir = parent_dir / "files"
+        search_dir = DEFAULT_FILES_DIR
     else:
         search_dir = Path(search_dir)
     
     # Create files directory if it doesn't exist (should already exist, but just in case)
     search_dir.mkdir(parents=True, exist_ok=True)
     
-    csv_files = glob.glob(str(search_dir / pattern))
+    # A plain "*suffix" pattern (like the default) is matched with endswith instead of fnmatch
+    suffix = pattern[1:]
+    if not pattern.startswith("*") or any(char in suffix for char in "*?["):
+        suffix = None
     
-    # Filter to only include files that look like competition match files
-    competition_patterns = ["UCL_", "UEL_", "UECL_"]
-    filtered_files = [
-        f for f in csv_files 
-        if any(os.path.basename(f).startswith(comp) for comp in competition_patterns)
-    ]
+    # Single directory scan; only include files that look like competition match files
+    competition_prefixes = ("UCL_", "UEL_", "UECL_")
+    abs_dir = os.path.abspath(search_dir)
+    with os.scandir(abs_dir) as entries:
+        csv_files = [
+            CsvFile(entry.path, entry.name, entry.stat().st_size) for entry in entries
+            if entry.name.startswith(competition_prefixes)
+            and (entry.name.endswith(suffix) if suffix is not None else fnmatch.fnmatch(entry.name, pattern))
+            and entry.is_file()
+        ]
     
-    return sorted(filtered_files)
+    return sorted(csv_files) if sort else csv_files
 
 
-def connect_to_snowflake(config: dict) -> snowflake.connector.SnowflakeConnection:
+# Connections handed out by connect_to_snowflake(shared=True), keyed on their connection parameters
+_SHARED_CONNECTIONS: Dict[frozenset, "snowflake.connector.SnowflakeConnection"] = {}
+_SHARED_CONNECTIONS_LOCK = threading.Lock()
+
+
+def connect_to_snowflake(config: dict,
+                         shared: bool = False,
+                         quiet: bool = False) -> "snowflake.connector.SnowflakeConnection":
     """
     Connect to Snowflake using configuration parameters.
     
     Args:
         config: Dictionary with connection parameters
+        shared: Reuse the open connection from an earlier shared call with the same
+            parameters instead of reconnecting (for processes that run the pipeline repeatedly).
+            The caller must not close a shared connection.
+        quiet: Don't print progress or errors (for connecting in the background; errors are still raised)
     
     Returns:
         Snowflake connection object
     """
-    print()
-    print("=" * 80)
-    print("Connecting to Snowflake...")
-    print("=" * 80)
+    connection_params = {
+        "account": config["account"],
+        "user": config["user"],
+        "password": config["password"],
+        # Heartbeats keep the session from expiring between runs of a long-lived process
+        "client_session_keep_alive": config.get("client_session_keep_alive", True)
+    }
+    
+    # Add optional parameters if they exist
+    for param in ("warehouse", "database", "schema", "role"):
+        if config.get(param):
+            connection_params[param] = config[param]
+    
+    key = frozenset(connection_params.items())
+    if shared:
+        with _SHARED_CONNECTIONS_LOCK:
+            conn = _SHARED_CONNECTIONS.get(key)
+        if conn is not None and not conn.is_closed():
+            if not quiet:
+                print(f"✅ Reusing Snowflake connection to account: {config['account']}")
+            return conn
+    
+    if not quiet:
+        print()
+        print("=" * 80)
+        print("Connecting to Snowflake...")
+        print("=" * 80)
+    
+    # Imported here so the file/config helpers don't pay the connector's import time
+    import snowflake.connector
     
     try:
-        connection_params = {
-            "account": config["account"],
-            "user": config["user"],
-            "password": config["password"]
-        }
-        
-        # Add optional parameters if they exist
-        if config.get("warehouse"):
-            connection_params["warehouse"] = config["warehouse"]
-        if config.get("database"):
-            connection_params["database"] = config["database"]
-        if config.get("schema"):
-            connection_params["schema"] = config["schema"]
-        if config.get("role"):
-            connection_params["role"] = config["role"]
-        
+        # database/schema set the session context once; helpers use fully qualified stage names
         conn = snowflake.connector.connect(**connection_params)
-        print(f"✅ Connected to Snowflake account: {config['account']}")
+        if shared:
+            with _SHARED_CONNECTIONS_LOCK:
+                _SHARED_CONNECTIONS[key] = conn
+        
+        if not quiet:
+            print(f"✅ Connected to Snowflake account: {config['account']}")
         return conn
         
     except Exception as e:
-        print(f"❌ Error connecting to Snowflake: {e}")
+        if not quiet:
+            print(f"❌ Error connecting to Snowflake: {e}")
         raise
 
 
-def get_file_path_in_stage(conn: snowflake.connector.SnowflakeConnection,
+def schema_namespace(database: Optional[str] = None, schema: Optional[str] = None) -> Optional[str]:
+    """
+    Return the qualifier (database.schema or schema) for objects in the configured schema.
+    
+    The database is only used together with a schema, since DB.NAME would be read as SCHEMA.NAME.
+    Returns None if no schema is configured.
+    """
+    if not schema:
+        return None
+    return f"{database}.{schema}" if database else schema
+
+
+def qualify_name(name: str, database: Optional[str] = None, schema: Optional[str] = None) -> str:
+    """
+    Return the fully qualified name (database.schema.name) of a stage or procedure.
+    
+    For stages this is the canonical stage key.
+    """
+    namespace = schema_namespace(database, schema)
+    return f"{namespace}.{name}" if namespace else name
+
+
+def _list_stage_files(conn: "snowflake.connector.SnowflakeConnection",
+                      stage_path: str,
+                      cursor=None) -> Dict[str, str]:
+    """
+    List the stage once and cache the result (see _StageListingCache).
+    
+    Args:
+        conn: Snowflake connection
+        stage_path: Full stage path (database.schema.stage)
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+    
+    Returns:
+        Dictionary mapping file name to its full path in the stage
+    """
+    files = _STAGE_LISTINGS.get(conn, stage_path)
+    if files is None:
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(f"LIST @{stage_path}")
+            rows = cursor.fetchall()
+        finally:
+            if own_cursor:
+                cursor.close()
+        
+        # LIST returns: name, size, md5, last_modified
+        files = {
+            os.path.basename(file_record[0]): file_record[0]
+            for file_record in rows
+            if isinstance(file_record, (list, tuple)) and len(file_record) > 0
+        }
+        _STAGE_LISTINGS.set(conn, stage_path, files)
+    return files
+
+
+def _lookup_staged(files: Dict[str, str], file_name: str) -> Optional[str]:
+    """Find a file in a stage listing by name, also matching the .gz name PUT gives it when compressing."""
+    return files.get(file_name) or files.get(f"{file_name}.gz")
+
+
+def _find_stage_file(conn: "snowflake.connector.SnowflakeConnection",
+                     stage_path: str,
+                     file_name: str,
+                     cursor=None) -> Optional[str]:
+    """
+    Look up a single file with a LIST filtered server-side, so only its row is returned.
+    
+    Args:
+        conn: Snowflake connection
+        stage_path: Full stage path (database.schema.stage)
+        file_name: Name of the file to look up (just filename, not full path)
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+    
+    Returns:
+        Full stage path to the file if it exists, None otherwise
+    """
+    from snowflake.connector.errors import ProgrammingError
+    
+    # PATTERN must match the whole path (optionally gzipped by PUT); backslashes are
+    # doubled for the SQL string literal
+    pattern = "(.*/)?" + re.escape(file_name) + "(\\.gz)?"
+    pattern = pattern.replace("\\", "\\\\").replace("'", "''")
+    
+    own_cursor = cursor is None
+    if own_cursor:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(f"LIST @{stage_path} PATTERN='{pattern}'")
+        rows = cursor.fetchall()
+    except ProgrammingError:
+        # PATTERN not accepted, fall back to listing the whole stage
+        return _lookup_staged(_list_stage_files(conn, stage_path, cursor), file_name)
+    finally:
+        if own_cursor:
+            cursor.close()
+    
+    # LIST returns: name, size, md5, last_modified
+    return _lookup_staged({os.path.basename(row[0]): row[0] for row in rows}, file_name)
+
+
+def invalidate_stage_cache(conn: "snowflake.connector.SnowflakeConnection", stage_path: str) -> None:
+    """Drop the cached listing of a stage after its contents changed (PUT/REMOVE/rename)."""
+    _STAGE_LISTINGS.invalidate(conn, stage_path)
+
+
+def get_file_path_in_stage(conn: "snowflake.connector.SnowflakeConnection",
                            file_name: str,
                            stage_name: str,
                            database: Optional[str] = None,
-                           schema: Optional[str] = None) -> Optional[str]:
+                           schema: Optional[str] = None,
+                           *,
+                           cursor=None) -> Optional[str]:
     """
     Get the full path of a file in the Snowflake stage if it exists.
     
@@ -156,58 +370,33 @@ def get_file_path_in_stage(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
     
     Returns:
         Full stage path to the file if it exists, None otherwise
     """
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
+    stage_path = qualify_name(stage_name, database, schema)
     
     try:
-        cursor = conn.cursor()
+        # A cached listing of the stage answers without a round-trip
+        files = _STAGE_LISTINGS.get(conn, stage_path)
+        if files is not None:
+            return _lookup_staged(files, file_name)
         
-        # Set context if database/schema provided
-        if database:
-            cursor.execute(f"USE DATABASE {database}")
-        if schema and database:
-            cursor.execute(f"USE SCHEMA {database}.{schema}")
-        elif schema:
-            cursor.execute(f"USE SCHEMA {schema}")
-        
-        # List files in stage and check if our file exists
-        cursor.execute(f"LIST @{stage_path}")
-        files = cursor.fetchall()
-        cursor.close()
-        
-        # Check if file exists (file name can be in different columns depending on LIST output)
-        for file_record in files:
-            if isinstance(file_record, (list, tuple)):
-                # LIST returns: name, size, md5, last_modified
-                stage_file_path = file_record[0] if len(file_record) > 0 else ""
-                # Compare just the filename (ignore path)
-                if os.path.basename(stage_file_path) == file_name:
-                    return stage_file_path
-            elif isinstance(file_record, str):
-                if os.path.basename(file_record) == file_name:
-                    return file_record
-        
-        return None
+        return _find_stage_file(conn, stage_path, file_name, cursor)
         
     except Exception as e:
         print(f"      ⚠️  Could not check file in stage: {e}")
         return None
 
 
-def check_file_exists_in_stage(conn: snowflake.connector.SnowflakeConnection,
+def check_file_exists_in_stage(conn: "snowflake.connector.SnowflakeConnection",
                                 file_name: str,
                                 stage_name: str,
                                 database: Optional[str] = None,
-                                schema: Optional[str] = None) -> bool:
+                                schema: Optional[str] = None,
+                                *,
+                                cursor=None) -> bool:
     """
     Check if a file already exists in the Snowflake stage.
     
@@ -217,26 +406,99 @@ def check_file_exists_in_stage(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
     
     Returns:
         True if file exists, False otherwise
     """
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
-    
-    file_path = get_file_path_in_stage(conn, file_name, stage_name, database, schema)
+    file_path = get_file_path_in_stage(conn, file_name, stage_name, database, schema, cursor=cursor)
     return file_path is not None
 
 
-def rename_all_files_in_stage(conn: snowflake.connector.SnowflakeConnection,
+def get_existing_stage_files(conn: "snowflake.connector.SnowflakeConnection",
+                             stage_name: str,
+                             database: Optional[str] = None,
+                             schema: Optional[str] = None,
+                             *,
+                             cursor=None,
+                             pattern: Optional[str] = None) -> Optional[Set[str]]:
+    """
+    Get the names of all files currently in the Snowflake stage with a single LIST.
+    
+    Use this instead of calling check_file_exists_in_stage once per file.
+    
+    Args:
+        conn: Snowflake connection
+        stage_name: Name of the stage
+        database: Optional database name
+        schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+        pattern: Optional regular expression to list only matching files (LIST ... PATTERN)
+    
+    Returns:
+        Set of file names (just filename, not full stage path), or None if the stage could not be listed
+    """
+    stage_path = qualify_name(stage_name, database, schema)
+    
+    try:
+        if pattern is None:
+            return set(_list_stage_files(conn, stage_path, cursor))
+        
+        # Filter server-side so only matching rows are returned
+        pattern_escaped = pattern.replace("'", "''")
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(f"LIST @{stage_path} PATTERN='{pattern_escaped}'")
+            rows = cursor.fetchall()
+        finally:
+            if own_cursor:
+                cursor.close()
+        
+        # LIST returns: name, size, md5, last_modified
+        return {os.path.basename(row[0]) for row in rows}
+    
+    except Exception as e:
+        print(f"      ⚠️  Could not list files in stage: {e}")
+        return None
+
+
+def snapshot_stage(conn: "snowflake.connector.SnowflakeConnection",
+                   stage_name: str,
+                   database: Optional[str] = None,
+                   schema: Optional[str] = None,
+                   *,
+                   cursor=None) -> Dict[str, str]:
+    """
+    LIST the stage once, e.g. at the start of a run, so later helpers don't have to.
+    
+    Pass the result as pre_listed to rename_all_files_in_stage/upload_file_to_stage.
+    
+    Args:
+        conn: Snowflake connection
+        stage_name: Name of the stage
+        database: Optional database name
+        schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+    
+    Returns:
+        Dictionary mapping file name to its full path in the stage
+    """
+    stage_path = qualify_name(stage_name, database, schema)
+    
+    # Always list afresh; the snapshot also primes the listing cache
+    invalidate_stage_cache(conn, stage_path)
+    return dict(_list_stage_files(conn, stage_path, cursor))
+
+
+def rename_all_files_in_stage(conn: "snowflake.connector.SnowflakeConnection",
                               stage_name: str,
                               database: Optional[str] = None,
-                              schema: Optional[str] = None) -> bool:
+                              schema: Optional[str] = None,
+                              *,
+                              cursor=None,
+                              pre_listed: Optional[Dict[str, str]] = None) -> bool:
     """
     Rename all files in the Snowflake stage by adding _OLD suffix.
     
@@ -245,64 +507,44 @@ def rename_all_files_in_stage(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+        pre_listed: Optional stage snapshot from snapshot_stage(), used instead of a LIST
     
     Returns:
         True if all renames were successful, False otherwise
     """
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
+    stage_path = qualify_name(stage_name, database, schema)
     
     try:
-        cursor = conn.cursor()
-        
-        # Set context if database/schema provided
-        if database:
-            cursor.execute(f"USE DATABASE {database}")
-        if schema and database:
-            cursor.execute(f"USE SCHEMA {database}.{schema}")
-        elif schema:
-            cursor.execute(f"USE SCHEMA {schema}")
-        
-        # List all files in stage
-        cursor.execute(f"LIST @{stage_path}")
-        files = cursor.fetchall()
+        # List all files in stage once (unless the caller already did); the renames reuse these paths
+        files = pre_listed if pre_listed is not None else _list_stage_files(conn, stage_path, cursor)
         
         if not files:
             print("      No files in stage to rename")
-            cursor.close()
             return True
         
         print(f"      Found {len(files)} file(s) to rename...")
         
-        renamed_count = 0
+        # Create new filenames with _OLD suffix, skipping files that already have it
+        renames = []
+        for file_name in files:
+            if "_OLD" in file_name:
+                continue
+            name_parts = os.path.splitext(file_name)
+            renames.append((file_name, f"{name_parts[0]}_OLD{name_parts[1]}"))
+        
+        # Rename all files with two multi-statement requests; whatever that
+        # couldn't rename is retried one file at a time
+        remaining, copy_usable = _rename_files_in_stage_batch(conn, renames, stage_path, cursor)
+        renamed_count = len(renames) - len(remaining)
         failed_count = 0
         
-        # Process each file
-        for file_record in files:
-            if isinstance(file_record, (list, tuple)) and len(file_record) > 0:
-                stage_file_path = file_record[0]
-                file_name = os.path.basename(stage_file_path)
-                
-                # Skip files that already have _OLD suffix
-                if "_OLD" in file_name:
-                    continue
-                
-                # Create new filename with _OLD suffix
-                name_parts = os.path.splitext(file_name)
-                new_file_name = f"{name_parts[0]}_OLD{name_parts[1]}"
-                
-                # Rename this file
-                if rename_file_in_stage(conn, file_name, new_file_name, stage_name, database, schema):
-                    renamed_count += 1
-                else:
-                    failed_count += 1
-        
-        cursor.close()
+        for file_name, new_file_name in remaining:
+            if _rename_file_in_stage_fast(conn, files[file_name], new_file_name, stage_path, cursor,
+                                          try_copy=copy_usable):
+                renamed_count += 1
+            else:
+                failed_count += 1
         
         if failed_count == 0:
             print(f"      ✅ Successfully renamed {renamed_count} file(s) to _OLD")
@@ -312,19 +554,18 @@ def rename_all_files_in_stage(conn: snowflake.connector.SnowflakeConnection,
             return False
             
     except Exception as e:
-        error_msg = str(e)
-        print(f"      ❌ Error renaming files in stage: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        print(f"      ❌ Error renaming files in stage: {type(e).__name__}: {e}")
         return False
 
 
-def rename_file_in_stage(conn: snowflake.connector.SnowflakeConnection,
+def rename_file_in_stage(conn: "snowflake.connector.SnowflakeConnection",
                          file_name: str,
                          new_file_name: str,
                          stage_name: str,
                          database: Optional[str] = None,
-                         schema: Optional[str] = None) -> bool:
+                         schema: Optional[str] = None,
+                         *,
+                         cursor=None) -> bool:
     """
     Rename a file in Snowflake stage by downloading it, uploading with new name, then removing old one.
     
@@ -335,44 +576,67 @@ def rename_file_in_stage(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
     
     Returns:
         True if rename was successful, False otherwise
     """
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
+    stage_path = qualify_name(stage_name, database, schema)
     
     # Get the full path of the file in stage
-    stage_file_path = get_file_path_in_stage(conn, file_name, stage_name, database, schema)
+    stage_file_path = get_file_path_in_stage(conn, file_name, stage_name, database, schema, cursor=cursor)
     if not stage_file_path:
         print(f"      ⚠️  File {file_name} not found in stage, cannot rename")
         return False
     
+    return _rename_file_in_stage_fast(conn, stage_file_path, new_file_name, stage_path, cursor)
+
+
+def _rename_file_in_stage_fast(conn: "snowflake.connector.SnowflakeConnection",
+                               stage_file_path: str,
+                               new_file_name: str,
+                               stage_path: str,
+                               cursor=None,
+                               try_copy: bool = True) -> bool:
+    """
+    Rename a file whose stage path is already known (no LIST).
+    
+    Args:
+        conn: Snowflake connection
+        stage_file_path: Path of the file as returned by LIST
+        new_file_name: New filename for the file
+        stage_path: Full stage path (database.schema.stage)
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+        try_copy: Try a server-side COPY FILES before GET/PUT (False when it's known not to rename)
+    
+    Returns:
+        True if rename was successful, False otherwise
+    """
+    file_name = os.path.basename(stage_file_path)
+    
+    own_cursor = cursor is None
     try:
-        cursor = conn.cursor()
+        if own_cursor:
+            cursor = conn.cursor()
         
-        # Set context if database/schema provided
-        if database:
-            cursor.execute(f"USE DATABASE {database}")
-        if schema and database:
-            cursor.execute(f"USE SCHEMA {database}.{schema}")
-        elif schema:
-            cursor.execute(f"USE SCHEMA {schema}")
+        # Fast path: copy the file server-side, no bytes go through the client
+        if try_copy and _copy_file_in_stage(cursor, stage_path, file_name, new_file_name):
+            print(f"      Removing original file {file_name} from stage...")
+            cursor.execute(f"REMOVE @{stage_path}/{file_name}")
+            
+            invalidate_stage_cache(conn, stage_path)
+            
+            print(f"      ✅ Renamed {file_name} to {new_file_name} in stage")
+            return True
         
+        # Fallback: download the file and upload it again under the new name
         # Create a temporary directory for downloading the file
         with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = Path(temp_dir) / file_name
-            
             # Step 1: Download the file from stage (GET)
             print(f"      Downloading {file_name} from stage for rename...")
             # GET command downloads to a directory, creating subdirectories matching stage path
             # We need to use a path that works on Windows (forward slashes for GET)
-            temp_dir_path = str(temp_dir).replace('\\', '/')
+            temp_dir_path = Path(temp_dir).as_posix()
             get_sql = f"GET @{stage_path}/{file_name} 'file://{temp_dir_path}'"
             cursor.execute(get_sql)
             get_results = cursor.fetchall()
@@ -380,36 +644,30 @@ def rename_file_in_stage(conn: snowflake.connector.SnowflakeConnection,
             # Check if GET was successful
             if not get_results:
                 print(f"      ⚠️  Failed to download file {file_name}")
-                cursor.close()
                 return False
             
-            # GET creates subdirectories matching the stage structure
-            # Find the downloaded file by walking the temp directory
-            downloaded_file = None
-            for root, dirs, files in os.walk(temp_dir):
-                # Look for the file (may be in a subdirectory)
-                if file_name in files:
-                    downloaded_file = Path(root) / file_name
-                    break
+            # GET returns the downloaded file name in its first column (file, size, status, message)
+            downloaded_file = Path(temp_dir) / str(get_results[0][0])
+            if not downloaded_file.exists():
+                # Non-recursive GET writes flat into the target directory
+                downloaded_file = Path(temp_dir) / file_name
             
-            if not downloaded_file or not downloaded_file.exists():
+            if not downloaded_file.exists():
                 print(f"      ⚠️  Downloaded file not found at expected location")
                 print(f"      Searched in: {temp_dir}")
-                cursor.close()
                 return False
             
-            # Step 2: Create a copy with the new name and upload it
+            # Step 2: Upload the downloaded bytes under the new name
+            # Streaming from memory avoids writing a renamed copy to disk; the bytes are
+            # already gzipped by the stage, so they are uploaded as-is
             print(f"      Uploading as {new_file_name}...")
-            new_temp_file = downloaded_file.parent / new_file_name
-            shutil.copy2(downloaded_file, new_temp_file)
+            with open(downloaded_file, 'rb') as f:
+                file_stream = io.BytesIO(f.read())
             
-            # Upload the file with new name
-            new_abs_path = new_temp_file.resolve()
-            new_file_path_normalized = str(new_abs_path).replace('\\', '/')
-            new_file_path_escaped = new_file_path_normalized.replace("'", "''")
-            put_sql = f"PUT 'file://{new_file_path_escaped}' @{stage_path}"
+            new_file_name_escaped = new_file_name.replace("'", "''")
+            put_sql = f"PUT 'file://{new_file_name_escaped}' @{stage_path} AUTO_COMPRESS=FALSE"
             
-            cursor.execute(put_sql)
+            cursor.execute(put_sql, file_stream=file_stream)
             put_results = cursor.fetchall()
             
             # Check PUT result
@@ -424,16 +682,14 @@ def rename_file_in_stage(conn: snowflake.connector.SnowflakeConnection,
             
             if not upload_success:
                 print(f"      ⚠️  Failed to upload renamed file {new_file_name}")
-                cursor.close()
                 return False
             
             # Step 3: Remove the original file from stage
             print(f"      Removing original file {file_name} from stage...")
             remove_sql = f"REMOVE @{stage_path}/{file_name}"
             cursor.execute(remove_sql)
-            remove_results = cursor.fetchall()
             
-            cursor.close()
+            invalidate_stage_cache(conn, stage_path)
             
             print(f"      ✅ Renamed {file_name} to {new_file_name} in stage")
             return True
@@ -441,17 +697,132 @@ def rename_file_in_stage(conn: snowflake.connector.SnowflakeConnection,
     except Exception as e:
         error_msg = str(e)
         print(f"      ❌ Error renaming file in stage: {error_msg}")
-        import traceback
-        traceback.print_exc()
         return False
+    finally:
+        if own_cursor and cursor is not None:
+            cursor.close()
+
+
+def _rename_files_in_stage_batch(conn: "snowflake.connector.SnowflakeConnection",
+                                 renames: List[Tuple[str, str]],
+                                 stage_path: str,
+                                 cursor=None) -> Tuple[List[Tuple[str, str]], bool]:
+    """
+    Rename several staged files server-side in one round-trip for the copies and one for the removes.
+    
+    All COPY FILES statements are sent as a single multi-statement request. An original
+    is only removed (again in a single request) once its copy is confirmed under the
+    new name, so a failed batch never loses a file.
+    
+    Args:
+        conn: Snowflake connection
+        renames: List of (current filename, new filename) pairs
+        stage_path: Full stage path (database.schema.stage)
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+    
+    Returns:
+        Tuple of (the (current filename, new filename) pairs that were not renamed,
+        whether retrying those with COPY FILES can work)
+    """
+    if not renames:
+        return [], True
+    
+    from snowflake.connector.errors import ProgrammingError
+    
+    own_cursor = cursor is None
+    if own_cursor:
+        cursor = conn.cursor()
+    try:
+        copy_sql = ";\n".join(
+            f"COPY FILES INTO @{stage_path}/{new_file_name} FROM @{stage_path} FILES = ('{file_name}')"
+            for file_name, new_file_name in renames
+        )
+        try:
+            cursor.execute(copy_sql, num_statements=len(renames))
+        except ProgrammingError as e:
+            # COPY FILES is not available, or one of the copies failed
+            print(f"      ℹ️  Batch server-side copy failed ({e.msg}), renaming file by file...")
+            return list(renames), True
+        
+        # One result set per COPY FILES statement, in order
+        copied, remaining, stray_copies = [], [], []
+        for index, (file_name, new_file_name) in enumerate(renames):
+            if index > 0:
+                cursor.nextset()
+            copied_files = [str(row[0]) for row in cursor.fetchall()]
+            if len(copied_files) == 1 and os.path.basename(copied_files[0]) == new_file_name:
+                copied.append((file_name, new_file_name))
+            else:
+                # The target was treated as a directory, so the copy is <new_file_name>/<file_name>.
+                # The cleanup path is built from that instead of the result column, since REMOVE
+                # prefix-matches and a relative name there would hit the original file
+                if copied_files:
+                    stray_copies.append(f"{new_file_name}/{file_name}")
+                remaining.append((file_name, new_file_name))
+        
+        to_remove = [file_name for file_name, _ in copied] + stray_copies
+        if to_remove:
+            remove_sql = ";\n".join(f"REMOVE @{stage_path}/{name}" for name in to_remove)
+            cursor.execute(remove_sql, num_statements=len(to_remove))
+        invalidate_stage_cache(conn, stage_path)
+        
+        for file_name, new_file_name in copied:
+            print(f"      ✅ Renamed {file_name} to {new_file_name} in stage")
+        # Copies only miss their new name when COPY FILES treats the target as a folder,
+        # which a per-file COPY FILES would repeat, so the rest go straight to GET/PUT
+        return remaining, not remaining
+    finally:
+        if own_cursor:
+            cursor.close()
 
 
-def upload_file_to_stage(conn: snowflake.connector.SnowflakeConnection,
+def _copy_file_in_stage(cursor, stage_path: str, file_name: str, new_file_name: str) -> bool:
+    """
+    Copy a staged file to a new name server-side with COPY FILES.
+    
+    Args:
+        cursor: Cursor to execute the COPY FILES statement on
+        stage_path: Full stage path (database.schema.stage)
+        file_name: Current filename in stage
+        new_file_name: New filename for the file
+    
+    Returns:
+        True if the copy exists under new_file_name, False if the caller should fall back to GET/PUT
+    """
+    from snowflake.connector.errors import ProgrammingError
+    
+    try:
+        cursor.execute(
+            f"COPY FILES INTO @{stage_path}/{new_file_name} "
+            f"FROM @{stage_path} FILES = ('{file_name}')"
+        )
+        copied_files = [str(row[0]) for row in cursor.fetchall()]
+    except ProgrammingError as e:
+        # COPY FILES is not available for this account/stage
+        print(f"      ℹ️  Server-side copy not available ({e.msg}), downloading instead...")
+        return False
+    
+    if len(copied_files) == 1 and os.path.basename(copied_files[0]) == new_file_name:
+        return True
+    
+    # The target was treated as a directory, so the copy is <new_file_name>/<file_name>;
+    # remove that path (not the result column, which REMOVE could prefix-match against
+    # the original) and let the caller use GET/PUT
+    if copied_files:
+        cursor.execute(f"REMOVE @{stage_path}/{new_file_name}/{file_name}")
+    return False
+
+
+def upload_file_to_stage(conn: "snowflake.connector.SnowflakeConnection",
                          file_path: str,
                          stage_name: str,
                          database: Optional[str] = None,
                          schema: Optional[str] = None,
-                         skip_existing: bool = False) -> bool:
+                         skip_existing: bool = False,
+                         *,
+                         cursor=None,
+                         pre_listed: Optional[Dict[str, str]] = None,
+                         parallel: int = 8) -> bool:
     """
     Upload a file to Snowflake stage.
     
@@ -461,118 +832,322 @@ def upload_file_to_stage(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        skip_existing: Keep a file already in the stage instead of overwriting it
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+        pre_listed: Optional stage snapshot from snapshot_stage(), used instead of a LIST
+        parallel: Number of threads the connector uses for the upload
     
     Returns:
         True if upload was successful, False otherwise
     """
     if not os.path.exists(file_path):
-        print(f"❌ File not found: {file_path}")
+        _print(f"❌ File not found: {file_path}")
         return False
     
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
+    stage_path = qualify_name(stage_name, database, schema)
     
     # Get just the filename for the stage
     filename = os.path.basename(file_path)
     
-    print(f"   Uploading {filename} to @{stage_path}...")
+    # The snapshot already tells whether the file (gzipped by PUT) is in the stage
+    if skip_existing and pre_listed is not None and (filename in pre_listed or f"{filename}.gz" in pre_listed):
+        _print(f"   ⏭️  Skipping {filename} (already in stage)")
+        return True
     
+    _print(f"   Uploading {filename} to @{stage_path}...")
+    
+    own_cursor = cursor is None
     try:
-        cursor = conn.cursor()
-        
-        # Ensure we're using the correct database and schema context
-        # This is important for the PUT command to work correctly
-        if database:
-            cursor.execute(f"USE DATABASE {database}")
-        if schema and database:
-            cursor.execute(f"USE SCHEMA {database}.{schema}")
-        elif schema:
-            cursor.execute(f"USE SCHEMA {schema}")
-        
-        # Convert Windows path for Snowflake PUT command
-        # Snowflake PUT on Windows needs forward slashes
-        abs_path = Path(file_path).resolve()
-        file_path_normalized = str(abs_path).replace('\\', '/')
+        if own_cursor:
+            cursor = conn.cursor()
         
         # PUT command format: PUT 'file://path/to/file' @stage
-        # On Windows, path must use forward slashes and be quoted
+        # On Windows, path must use forward slashes (as_posix) and be quoted
         # Escape single quotes in the path if any (unlikely but possible)
-        file_path_escaped = file_path_normalized.replace("'", "''")
-        put_sql = f"PUT 'file://{file_path_escaped}' @{stage_path}"
+        # Always gzip on upload: CSV compresses well and LOAD_MATCHES_FROM_STAGE reads the .csv.gz files
+        # abspath only prepends the working directory; PUT doesn't need symlinks resolved
+        abs_path = Path(os.path.abspath(file_path))
+        path_str = abs_path.as_posix().replace("'", "''")
+        # OVERWRITE=TRUE skips PUT's own digest check against the stage; it is only
+        # needed when skipping existing files without a snapshot to decide from
+        overwrite = not skip_existing or pre_listed is not None
+        put_sql = (
+            f"PUT 'file://{path_str}' @{stage_path} "
+            f"PARALLEL={parallel} AUTO_COMPRESS=TRUE SOURCE_COMPRESSION=NONE "
+            f"OVERWRITE={'TRUE' if overwrite else 'FALSE'}"
+        )
         
-        print(f"      Command: {put_sql[:200]}...")  # Truncate long paths for display
+        _print(f"      Command: {put_sql[:200]}...")  # Truncate long paths for display
         
         # Execute PUT command
         cursor.execute(put_sql)
+        invalidate_stage_cache(conn, stage_path)
         
         # PUT command returns a result set with upload information
         # Columns: source, target, source_size, target_size, source_compression, target_compression, status, message
-        results = cursor.fetchall()
-        
-        if results:
-            # Process each result row (usually just one for a single file)
-            for row in results:
-                # Handle tuple or other formats
-                if isinstance(row, (list, tuple)) and len(row) >= 7:
-                    status = str(row[6]).upper()
-                    message = str(row[7]) if len(row) > 7 else ""
-                    
-                    print(f"      Status: {status}")
-                    if message:
-                        print(f"      Message: {message}")
-                    
-                    if "UPLOADED" in status:
-                        print(f"      ✅ File uploaded successfully")
-                        cursor.close()
-                        return True
-                    elif "SKIPPED" in status:
-                        print(f"      ⚠️  File was skipped (may already exist)")
-                        cursor.close()
-                        return True
-                    else:
-                        print(f"      ⚠️  Unexpected status: {status}")
-                        cursor.close()
-                        return False
+        # Process each result row as it is read (usually just one for a single file)
+        got_results = False
+        for row in cursor:
+            got_results = True
+            # Handle tuple or other formats
+            if isinstance(row, (list, tuple)) and len(row) >= 7:
+                status = str(row[6]).upper()
+                message = str(row[7]) if len(row) > 7 else ""
+                
+                _print(f"      Status ({filename}): {status}")
+                if message:
+                    _print(f"      Message: {message}")
+                
+                if "UPLOADED" in status:
+                    _print(f"      ✅ {filename} uploaded successfully")
+                    return True
+                elif "SKIPPED" in status:
+                    _print(f"      ⚠️  {filename} was skipped (may already exist)")
+                    return True
                 else:
-                    # If we can't parse the row structure, print it for debugging
-                    print(f"      ⚠️  Unexpected result format: {row}")
-        
-        cursor.close()
+                    _print(f"      ⚠️  Unexpected status: {status}")
+                    return False
+            else:
+                # If we can't parse the row structure, print it for debugging
+                _print(f"      ⚠️  Unexpected result format: {row}")
         
         # If we got here, we didn't get a clear success indication
-        if results:
-            print(f"      ⚠️  Upload may have succeeded, but status unclear")
+        if got_results:
+            _print(f"      ⚠️  Upload may have succeeded, but status unclear")
             return True
         else:
-            print(f"      ❌ No results returned from PUT command")
+            _print(f"      ❌ No results returned from PUT command")
             return False
         
     except Exception as e:
         error_msg = str(e)
-        print(f"      ❌ Error uploading file: {error_msg}")
+        _print(f"      ❌ Error uploading {filename}: {type(e).__name__}: {error_msg}")
         
         # Provide helpful error messages
         if "does not exist" in error_msg.lower() or "not found" in error_msg.lower():
-            print(f"      💡 Tip: Make sure the stage '{stage_path}' exists")
+            _print(f"      💡 Tip: Make sure the stage '{stage_path}' exists")
         elif "permission" in error_msg.lower() or "access" in error_msg.lower():
-            print(f"      💡 Tip: Check that your user has WRITE permission on the stage")
+            _print(f"      💡 Tip: Check that your user has WRITE permission on the stage")
         elif "file://" in error_msg.lower():
-            print(f"      💡 Tip: The file path format might be incorrect for your OS")
+            _print(f"      💡 Tip: The file path format might be incorrect for your OS")
         
-        import traceback
-        traceback.print_exc()
         return False
+    finally:
+        if own_cursor and cursor is not None:
+            cursor.close()
+
+
+def _common_glob(file_names: List[str]) -> str:
+    """Build the narrowest prefix*suffix wildcard matching all the given file names."""
+    if len(file_names) == 1:
+        return glob.escape(file_names[0])
+    
+    prefix = os.path.commonprefix(file_names)
+    suffix = os.path.commonprefix([name[len(prefix):][::-1] for name in file_names])[::-1]
+    return f"{glob.escape(prefix)}*{glob.escape(suffix)}"
+
+
+def pre_gzip_files(file_paths: List[str], target_dir: str, max_workers: Optional[int] = None) -> List[str]:
+    """
+    Gzip files in parallel into target_dir, so PUT can send them without compressing them itself.
+    
+    zlib releases the GIL while compressing, so the worker threads use all cores.
+    
+    Args:
+        file_paths: Local file paths to compress
+        target_dir: Directory the <name>.gz files are written to
+        max_workers: Number of compression threads (default: number of CPUs)
+    
+    Returns:
+        Paths of the gzipped files, in the same order as file_paths
+    """
+    def gzip_file(file_path: str) -> str:
+        gz_path = os.path.join(target_dir, os.path.basename(file_path) + ".gz")
+        with open(file_path, 'rb') as f, gzip.open(gz_path, 'wb', compresslevel=6) as g:
+            shutil.copyfileobj(f, g, 1 << 20)
+        return gz_path
+    
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(gzip_file, file_paths))
+
+
+def _put_files(cursor,
+               source_pattern: Path,
+               stage_path: str,
+               parallel: int,
+               overwrite: bool,
+               pre_compressed: bool = False):
+    """
+    Run one PUT for all local files matching source_pattern.
+    
+    Args:
+        cursor: Cursor to execute the PUT on
+        source_pattern: Local path, may contain wildcards
+        stage_path: Full stage path (database.schema.stage)
+        parallel: Number of threads the connector uses for the upload
+        overwrite: Overwrite files that already exist in the stage
+        pre_compressed: The files are already gzipped (see pre_gzip_files)
+    
+    Returns:
+        The cursor, to iterate the PUT result rows (one per file) as they are read
+    """
+    # Snowflake PUT on Windows needs forward slashes
+    source_escaped = source_pattern.as_posix().replace("'", "''")
+    compression = "AUTO_COMPRESS=FALSE SOURCE_COMPRESSION=GZIP" if pre_compressed else "AUTO_COMPRESS=TRUE SOURCE_COMPRESSION=NONE"
+    put_sql = (
+        f"PUT 'file://{source_escaped}' @{stage_path} "
+        f"PARALLEL={parallel} {compression} "
+        f"OVERWRITE={'TRUE' if overwrite else 'FALSE'}"
+    )
+    
+    _print(f"      Command: {put_sql[:200]}...")  # Truncate long paths for display
+    
+    cursor.execute(put_sql)
+    return cursor
+
+
+def _record_put_results(rows, uploaded_files: List[str], skipped_files: List[str]) -> None:
+    """
+    Report PUT result rows as they are read, collecting the uploaded/skipped target names.
+    
+    Args:
+        rows: PUT result rows (a cursor or list)
+        uploaded_files: List the uploaded target names are appended to
+        skipped_files: List the skipped target names are appended to
+    """
+    # Columns: source, target, source_size, target_size, source_compression, target_compression, status, message
+    for row in rows:
+        if isinstance(row, (list, tuple)) and len(row) >= 7:
+            source = str(row[0])
+            target = str(row[1])
+            status = str(row[6]).upper()
+            
+            if "UPLOADED" in status:
+                _print(f"      ✅ {source} uploaded as {target}")
+                uploaded_files.append(target)
+            elif "SKIPPED" in status:
+                _print(f"      ⚠️  {source} was skipped (may already exist)")
+                skipped_files.append(target)
+            else:
+                message = str(row[7]) if len(row) > 7 else ""
+                _print(f"      ⚠️  {source}: unexpected status {status} {message}")
+        else:
+            _print(f"      ⚠️  Unexpected result format: {row}")
 
 
-def list_stage_files(conn: snowflake.connector.SnowflakeConnection,
+def upload_files_to_stage_bulk(conn: "snowflake.connector.SnowflakeConnection",
+                               file_paths: List[str],
+                               stage_name: str,
+                               database: Optional[str] = None,
+                               schema: Optional[str] = None,
+                               parallel: int = 8,
+                               overwrite: bool = False,
+                               *,
+                               cursor=None,
+                               pre_gzip: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Upload several files to Snowflake stage with one wildcard PUT per directory.
+    
+    When the narrowest wildcard (e.g. U*_matches.csv) matches exactly the requested
+    files, they are uploaded straight from their directory; otherwise they are linked
+    into a temporary directory first. The connector uploads them with PARALLEL threads.
+    
+    Args:
+        conn: Snowflake connection
+        file_paths: Local file paths to upload
+        stage_name: Name of the stage
+        database: Optional database name
+        schema: Optional schema name
+        parallel: Number of threads the connector uses for the upload
+        overwrite: Overwrite files that already exist in the stage
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
+        pre_gzip: Gzip the files in parallel (pre_gzip_files) before the PUT instead of
+            letting the connector compress them
+    
+    Returns:
+        Tuple of (uploaded file names, skipped file names) as reported by PUT
+    """
+    if not file_paths:
+        return [], []
+    
+    stage_path = qualify_name(stage_name, database, schema)
+    
+    _print(f"   Uploading {len(file_paths)} file(s) to @{stage_path}...")
+    
+    uploaded_files = []
+    skipped_files = []
+    
+    # Group the files by directory so each directory is uploaded with one wildcard PUT
+    files_by_dir = {}
+    for file_path in file_paths:
+        # abspath leaves absolute paths (e.g. from find_csv_files) as they are, without any stat calls
+        abs_path = Path(os.path.abspath(file_path))
+        files_by_dir.setdefault(abs_path.parent, []).append(abs_path.name)
+    
+    own_cursor = cursor is None
+    try:
+        if own_cursor:
+            cursor = conn.cursor()
+        
+        for directory, file_names in files_by_dir.items():
+            pattern = _common_glob(file_names)
+            
+            if pre_gzip:
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    # The temp directory only holds this batch, so the wildcard matches just these files
+                    pre_gzip_files([str(directory / file_name) for file_name in file_names], temp_dir)
+                    put_rows = _put_files(cursor, Path(temp_dir) / f"{pattern}.gz", stage_path,
+                                          parallel, overwrite, pre_compressed=True)
+                    _record_put_results(put_rows, uploaded_files, skipped_files)
+                continue
+            
+            matched_files = {os.path.basename(f) for f in glob.glob(str(directory / pattern))}
+            
+            if matched_files == set(file_names):
+                # The wildcard matches exactly these files, upload straight from their directory
+                put_rows = _put_files(cursor, directory / pattern, stage_path, parallel, overwrite)
+                _record_put_results(put_rows, uploaded_files, skipped_files)
+                continue
+            
+            with tempfile.TemporaryDirectory() as temp_dir:
+                # Stage the batch in its own directory so the wildcard only matches these files
+                for file_name in file_names:
+                    link_path = Path(temp_dir) / file_name
+                    try:
+                        os.symlink(directory / file_name, link_path)
+                    except OSError:
+                        # Symlinks need extra privileges on Windows, fall back to a copy
+                        shutil.copy2(directory / file_name, link_path)
+                
+                put_rows = _put_files(cursor, Path(temp_dir) / pattern, stage_path, parallel, overwrite)
+                _record_put_results(put_rows, uploaded_files, skipped_files)
+        
+        invalidate_stage_cache(conn, stage_path)
+        
+        return uploaded_files, skipped_files
+    
+    except Exception as e:
+        error_msg = str(e)
+        _print(f"      ❌ Error uploading files: {type(e).__name__}: {error_msg}")
+        
+        if "does not exist" in error_msg.lower() or "not found" in error_msg.lower():
+            _print(f"      💡 Tip: Make sure the stage '{stage_path}' exists")
+        elif "permission" in error_msg.lower() or "access" in error_msg.lower():
+            _print(f"      💡 Tip: Check that your user has WRITE permission on the stage")
+        
+        return uploaded_files, skipped_files
+    finally:
+        if own_cursor and cursor is not None:
+            cursor.close()
+
+
+def list_stage_files(conn: "snowflake.connector.SnowflakeConnection",
                      stage_name: str,
                      database: Optional[str] = None,
-                     schema: Optional[str] = None) -> None:
+                     schema: Optional[str] = None,
+                     pattern: Optional[str] = None,
+                     *,
+                     cursor=None) -> None:
     """
     List files in the Snowflake stage.
     
@@ -581,20 +1156,27 @@ def list_stage_files(conn: snowflake.connector.SnowflakeConnection,
         stage_name: Name of the stage
         database: Optional database name
         schema: Optional schema name
+        pattern: Optional regular expression to list only matching files (LIST ... PATTERN)
+        cursor: Optional cursor to reuse (a new one is opened and closed otherwise)
     """
-    # Build full stage path
-    if database and schema:
-        stage_path = f"{database}.{schema}.{stage_name}"
-    elif schema:
-        stage_path = f"{schema}.{stage_name}"
-    else:
-        stage_path = stage_name
+    stage_path = qualify_name(stage_name, database, schema)
     
     try:
-        cursor = conn.cursor()
-        cursor.execute(f"LIST @{stage_path}")
-        files = cursor.fetchall()
-        cursor.close()
+        list_sql = f"LIST @{stage_path}"
+        if pattern:
+            # Filter server-side so only matching rows are returned
+            pattern_escaped = pattern.replace("'", "''")
+            list_sql += f" PATTERN='{pattern_escaped}'"
+        
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(list_sql)
+            files = cursor.fetchall()
+        finally:
+            if own_cursor:
+                cursor.close()
         
         if files:
             print(f"\n📁 Files in stage '{stage_path}':")
@@ -632,23 +1214,19 @@ def main():
     print("=" * 80)
     print("Finding CSV files...")
     print("=" * 80)
-    csv_files = find_csv_files()
+    # Each file is uploaded independently, so the order doesn't matter
+    csv_files = find_csv_files(sort=False)
     
     if not csv_files:
-        # Determine files directory path for error message
-        parent_dir = SCRIPT_DIR.parent
-        files_dir = parent_dir / "files"
-        
         print("❌ No CSV files found matching pattern '*_matches.csv'")
         print("   Expected files like: UCL_champions_league_matches.csv")
-        print(f"   Searched in: {files_dir}")
+        print(f"   Searched in: {DEFAULT_FILES_DIR}")
         print("   Make sure get-results.py has been executed and generated CSV files.")
         sys.exit(1)
     
     print(f"✅ Found {len(csv_files)} CSV file(s):")
     for csv_file in csv_files:
-        file_size = os.path.getsize(csv_file)
-        print(f"   - {csv_file} ({file_size:,} bytes)")
+        print(f"   - {csv_file.path} ({csv_file.size:,} bytes)")
     
     # Connect to Snowflake
     try:
@@ -657,7 +1235,19 @@ def main():
         print(f"\n❌ Failed to connect to Snowflake: {e}")
         sys.exit(1)
     
+    # One cursor is shared by all stage operations of this run
+    cursor = conn.cursor()
+    
     try:
+        # List the stage once; the helpers below reuse this snapshot
+        stage_snapshot = snapshot_stage(
+            conn,
+            stage_name,
+            config.get("database"),
+            config.get("schema"),
+            cursor=cursor
+        )
+        
         # Step 1: Rename all existing files in stage to _OLD
         print()
         print("=" * 80)
@@ -668,7 +1258,9 @@ def main():
             conn,
             stage_name,
             config.get("database"),
-            config.get("schema")
+            config.get("schema"),
+            cursor=cursor,
+            pre_listed=stage_snapshot
         )
         
         # Step 2: Upload new CSV files
@@ -679,16 +1271,19 @@ def main():
         
         uploaded_count = 0
         
-        for csv_file in csv_files:
-            if upload_file_to_stage(
-                conn,
-                csv_file,
-                stage_name,
-                config.get("database"),
-                config.get("schema"),
-                skip_existing=False
-            ):
-                uploaded_count += 1
+        # Upload all files with one PUT; the connector runs put_parallel upload threads
+        uploaded_files, _ = upload_files_to_stage_bulk(
+            conn,
+            [csv_file.path for csv_file in csv_files],
+            stage_name,
+            config.get("database"),
+            config.get("schema"),
+            parallel=config.get("put_parallel", 8),
+            overwrite=True,
+            cursor=cursor,
+            pre_gzip=config.get("pre_gzip", True)
+        )
+        uploaded_count = len(uploaded_files)
         
         print()
         print(f"✅ Successfully uploaded {uploaded_count} file(s)")
@@ -700,6 +1295,7 @@ def main():
         print("=" * 80)
         
     finally:
+        cursor.close()
         conn.close()
         print("\n🔌 Disconnected from Snowflake")
 
@@ -9,13 +9,22 @@ This script orchestrates the complete workflow:
 Note: Run create_objects.py first to create the database objects and stored procedure.
 """
 
+import importlib.util
 import json
+import logging
 import os
+import queue
 import sys
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
-import snowflake.connector
+from typing import TYPE_CHECKING, Callable, List, Optional, Set
+
+if TYPE_CHECKING:
+    # Only for type checkers; the connector is imported when connecting
+    import snowflake.connector
 
 # Import functions from upload_to_snowflake.py
 try:
@@ -23,9 +32,12 @@ try:
         load_config,
         connect_to_snowflake,
         find_csv_files,
-        upload_file_to_stage,
-        check_file_exists_in_stage,
-        list_stage_files
+        upload_files_to_stage_bulk,
+        get_existing_stage_files,
+        list_stage_files,
+        _print,
+        qualify_name,
+        schema_namespace
     )
 except ImportError as e:
     print(f"❌ Error importing from upload_to_snowflake.py: {e}")
@@ -36,6 +48,105 @@ except ImportError as e:
 # Get the directory where this script is located
 SCRIPT_DIR = Path(__file__).parent.absolute()
 
+log = logging.getLogger(__name__)
+
+# LIST pattern for the match files this pipeline uploads (gzipped by PUT)
+MATCH_FILES_PATTERN = ".*_matches[.]csv([.]gz)?"
+
+# Full reload of every staged file (baseline) and incremental load of the given files
+LOAD_ALL_PROCEDURE = "LOAD_MATCHES_FROM_STAGE"
+LOAD_FILES_PROCEDURE = "LOAD_MATCHES_FROM_FILES"
+
+# Maximum number of file names Snowflake accepts in COPY INTO ... FILES = (...)
+MAX_COPY_FILES = 1000
+
+
+class ConnectionPool:
+    """
+    Small pool of Snowflake connections for worker threads.
+    
+    Connections are opened lazily up to max_size, so a run only pays for the
+    logins it actually needs. The connection passed in is the first pooled
+    connection and is left open by close() (its owner closes it).
+    
+    Each thread keeps one cursor per connection (see cursor()), so helpers that
+    accept a cursor don't open and close one on every call.
+    """
+    
+    def __init__(self, config: dict, conn: "snowflake.connector.SnowflakeConnection", max_size: int):
+        self._config = config
+        self._max_size = max(1, max_size)
+        self._idle = queue.Queue()
+        self._idle.put(conn)
+        self._opened = []
+        self._created = 1
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cursors = []
+    
+    def get(self) -> "snowflake.connector.SnowflakeConnection":
+        """Take an idle connection, opening a new one if the pool is not full yet."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_open = self._created < self._max_size
+            if can_open:
+                self._created += 1
+        
+        if not can_open:
+            return self._idle.get()
+        
+        try:
+            # Quiet: workers open pooled connections concurrently and their banners would interleave
+            conn = connect_to_snowflake(self._config, quiet=True)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        self._opened.append(conn)
+        return conn
+    
+    def put(self, conn: "snowflake.connector.SnowflakeConnection") -> None:
+        """Return a connection to the pool."""
+        self._idle.put(conn)
+    
+    def cursor(self, conn: "snowflake.connector.SnowflakeConnection"):
+        """Return the calling thread's cursor on conn, opening it on first use."""
+        cursors = getattr(self._local, "cursors", None)
+        if cursors is None:
+            cursors = self._local.cursors = {}
+        if conn not in cursors:
+            cursors[conn] = conn.cursor()
+            with self._lock:
+                self._cursors.append(cursors[conn])
+        return cursors[conn]
+    
+    def run(self, func: Callable, *args, **kwargs):
+        """Call func(conn, *args, **kwargs) with a pooled connection."""
+        conn = self.get()
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            self.put(conn)
+    
+    def run_with_cursor(self, func: Callable, *args, **kwargs):
+        """Like run(), also passing this thread's cursor on the connection as cursor=."""
+        conn = self.get()
+        try:
+            return func(conn, *args, cursor=self.cursor(conn), **kwargs)
+        finally:
+            self.put(conn)
+    
+    def close(self) -> None:
+        """Close the cursors handed out by the pool and the connections it opened."""
+        for cursor in self._cursors:
+            cursor.close()
+        for conn in self._opened:
+            conn.close()
+
 
 def execute_scraper(script_path: Optional[str] = None) -> bool:
     """
@@ -64,22 +175,40 @@ def execute_scraper(script_path: Optional[str] = None) -> bool:
     print("=" * 80)
     print()
     
+    # Run the scraper in this interpreter to skip a second Python startup;
+    # fall back to a subprocess if it can't be imported
+    scraper_main = None
     try:
-        # Execute the Python script
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            capture_output=False,  # Show output in real-time
-            text=True,
-            check=False  # Don't raise exception on non-zero exit
-        )
+        spec = importlib.util.spec_from_file_location("get_results", script_path)
+        scraper = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(scraper)
+        scraper_main = scraper.main
+    except Exception as e:
+        print(f"⚠️  Could not import scraper ({e}), running it as a separate process...")
+    
+    try:
+        if scraper_main is not None:
+            try:
+                returncode = scraper_main()
+            except SystemExit as e:
+                returncode = 0 if e.code is None else e.code
+        else:
+            # Execute the Python script
+            result = subprocess.run(
+                [sys.executable, str(script_path)],
+                capture_output=False,  # Show output in real-time
+                text=True,
+                check=False  # Don't raise exception on non-zero exit
+            )
+            returncode = result.returncode
         
-        if result.returncode == 0:
+        if returncode == 0:
             print()
             print("✅ Scraper execution completed successfully")
             return True
         else:
             print()
-            print(f"⚠️  Scraper exited with code: {result.returncode}")
+            print(f"⚠️  Scraper exited with code: {returncode}")
             return False
             
     except Exception as e:
@@ -87,13 +216,18 @@ def execute_scraper(script_path: Optional[str] = None) -> bool:
         return False
 
 
-def load_data_to_tables(conn: snowflake.connector.SnowflakeConnection, config: dict) -> bool:
+def load_data_to_tables(conn: "snowflake.connector.SnowflakeConnection",
+                        config: dict,
+                        while_waiting: Optional[Callable[[], None]] = None) -> bool:
     """
     Call the stored procedure to load data from stage to tables.
     
+    The procedure is submitted asynchronously, so other work can run while it executes.
+    
     Args:
         conn: Snowflake connection
         config: Configuration dictionary
+        while_waiting: Optional function to run while the procedure executes
     
     Returns:
         True if loading was successful, False otherwise
@@ -103,30 +237,27 @@ def load_data_to_tables(conn: snowflake.connector.SnowflakeConnection, config: d
     print("Step 3: Loading data from stage to tables...")
     print("=" * 80)
     
+    # Build fully qualified procedure name (no USE DATABASE/SCHEMA needed)
+    procedure_name = qualify_name(LOAD_ALL_PROCEDURE, config.get("database"), config.get("schema"))
+    
     try:
         cursor = conn.cursor()
         
-        # Set database/schema context
-        if config.get("database"):
-            cursor.execute(f"USE DATABASE {config['database']}")
-        if config.get("schema") and config.get("database"):
-            cursor.execute(f"USE SCHEMA {config['database']}.{config['schema']}")
-        elif config.get("schema"):
-            cursor.execute(f"USE SCHEMA {config['schema']}")
-        
-        # Build fully qualified procedure name
-        if config.get("database") and config.get("schema"):
-            procedure_name = f"{config['database']}.{config['schema']}.LOAD_MATCHES_FROM_STAGE"
-        elif config.get("schema"):
-            procedure_name = f"{config['schema']}.LOAD_MATCHES_FROM_STAGE"
-        else:
-            procedure_name = "LOAD_MATCHES_FROM_STAGE"
-        
         # Call the stored procedure with fully qualified name
         call_sql = f"CALL {procedure_name}()"
         print(f"   Calling procedure: {procedure_name}")
         print(f"   SQL: {call_sql}")
-        cursor.execute(call_sql)
+        cursor.execute_async(call_sql)
+        query_id = cursor.sfqid
+        
+        # Do other work while the procedure runs, then wait for it to finish
+        if while_waiting is not None:
+            while_waiting()
+        
+        while conn.is_still_running(conn.get_query_status_throw_if_error(query_id)):
+            time.sleep(0.5)
+        
+        cursor.get_results_from_sfqid(query_id)
         result = cursor.fetchone()
         cursor.close()
         
@@ -140,17 +271,85 @@ def load_data_to_tables(conn: snowflake.connector.SnowflakeConnection, config: d
         return True
         
     except Exception as e:
-        print(f"\n❌ Error loading data to tables: {e}")
-        import traceback
-        traceback.print_exc()
-        if config.get("database") and config.get("schema"):
-            proc_name = f"{config['database']}.{config['schema']}.LOAD_MATCHES_FROM_STAGE"
-        else:
-            proc_name = "LOAD_MATCHES_FROM_STAGE"
-        print(f"\n   You can manually run: CALL {proc_name}();")
+        print(f"\n❌ Error loading data to tables: {type(e).__name__}: {e}")
+        print(f"\n   You can manually run: CALL {procedure_name}();")
         return False
 
 
+def load_files_to_tables(conn: "snowflake.connector.SnowflakeConnection",
+                         config: dict,
+                         staged_files: List[str]) -> int:
+    """
+    Call the stored procedure to load a batch of staged files into the tables.
+    
+    This runs on a worker thread so a batch can be loaded while the next
+    batch is still being uploaded.
+    
+    Args:
+        conn: Snowflake connection
+        config: Configuration dictionary
+        staged_files: File names in the stage as reported by PUT (e.g. UCL_champions_league_matches.csv.gz)
+    
+    Returns:
+        Number of rows loaded
+    """
+    # Build fully qualified procedure name
+    procedure_name = qualify_name(LOAD_FILES_PROCEDURE, config.get("database"), config.get("schema"))
+    
+    placeholders = ", ".join(["%s"] * len(staged_files))
+    call_sql = f"CALL {procedure_name}(ARRAY_CONSTRUCT({placeholders}))"
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute(call_sql, staged_files)
+        result = cursor.fetchone()
+    finally:
+        cursor.close()
+    
+    rows_loaded = int(result[0]) if result and result[0] is not None else 0
+    _print(f"   ✅ Loaded {rows_loaded:,} row(s) from {len(staged_files)} file(s)")
+    return rows_loaded
+
+
+def verify_load_procedures(conn: "snowflake.connector.SnowflakeConnection", config: dict) -> Set[str]:
+    """
+    Check which load stored procedures exist before data is loaded.
+    
+    Deployments created before LOAD_MATCHES_FROM_FILES was added only have
+    LOAD_MATCHES_FROM_STAGE; those fall back to reloading all staged files.
+    
+    Args:
+        conn: Snowflake connection
+        config: Configuration dictionary
+    
+    Returns:
+        Names of the load procedures that exist (both if the check itself failed,
+        in which case the CALL will report the problem)
+    """
+    show_sql = "SHOW PROCEDURES LIKE 'LOAD_MATCHES_FROM_%'"
+    namespace = schema_namespace(config.get("database"), config.get("schema"))
+    if namespace:
+        show_sql += f" IN SCHEMA {namespace}"
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute(show_sql)
+        # SHOW PROCEDURES returns: created_on, name, schema_name, ...
+        procedure_names = {str(row[1]).upper() for row in cursor.fetchall()}
+        cursor.close()
+    except Exception as e:
+        _print(f"⚠️  Could not verify load procedures: {e}")
+        return {LOAD_ALL_PROCEDURE, LOAD_FILES_PROCEDURE}
+    
+    if LOAD_ALL_PROCEDURE not in procedure_names:
+        _print(f"\n⚠️  Load procedure not found: {LOAD_ALL_PROCEDURE}")
+        _print("   Run ddl/load_data_from_stage.sql to create it")
+    elif LOAD_FILES_PROCEDURE not in procedure_names:
+        _print(f"\n⚠️  Load procedure not found: {LOAD_FILES_PROCEDURE}, all staged files will be reloaded instead")
+        _print("   Run ddl/load_data_from_stage.sql to load only the uploaded files")
+    return procedure_names & {LOAD_ALL_PROCEDURE, LOAD_FILES_PROCEDURE}
+
+
 def main():
     """Main execution function."""
     print("=" * 80)
@@ -163,22 +362,76 @@ def main():
     # Load configuration
     config = load_config()
     stage_name = config.get("stage_name", "EUROPEAN_CUPS_STAGE")
+    database = config.get("database")
+    schema = config.get("schema")
+    skip_existing = config.get("skip_existing_files", True)
     load_to_tables = config.get("load_to_tables", False)
+    batch_size = config.get("load_batch_size", 100)
+    put_parallel = config.get("put_parallel", 8)
+    copy_parallel = config.get("copy_parallel", 4)
+    upload_parallel = config.get("upload_parallel", 4)
+    pool_size = config.get("connection_pool_size", max(copy_parallel, upload_parallel))
+    verify_listing = config.get("verify_listing", False)
+    pre_gzip = config.get("pre_gzip", True)
+    # Keep the main connection open for the next pipeline run in this process
+    persistent_connection = config.get("persistent_connection", False)
     
-    # Step 1: Execute scraper
-    if not execute_scraper():
-        print("\n⚠️  Scraper execution had issues, but continuing with upload...")
-        print()
+    def connect_and_list_stage():
+        # Quiet so nothing is printed in the middle of the scraper's output; Step 2 reports the connection
+        conn = connect_to_snowflake(config, shared=persistent_connection, quiet=True)
+        existing_files = None
+        if skip_existing:
+            # List the stage once up front instead of once per file
+            existing_files = get_existing_stage_files(
+                conn,
+                stage_name,
+                database,
+                schema,
+                pattern=MATCH_FILES_PATTERN
+            )
+        return conn, existing_files
+    
+    # Connecting and listing the stage don't depend on the scraper's output,
+    # so do them while the scraper runs
+    with ThreadPoolExecutor(max_workers=1) as connect_executor:
+        connect_future = connect_executor.submit(connect_and_list_stage)
+        
+        # Step 1: Execute scraper
+        try:
+            scraper_ok = execute_scraper()
+        except BaseException:
+            # Don't leave the background connection open when the scraper is interrupted
+            try:
+                background_conn, _ = connect_future.result()
+            except Exception:
+                pass
+            else:
+                if not persistent_connection:
+                    background_conn.close()
+            raise
+        
+        if not scraper_ok:
+            print("\n⚠️  Scraper execution had issues, but continuing with upload...")
+            print()
+    
+    try:
+        conn, existing_files = connect_future.result()
+    except Exception as e:
+        print(f"\n❌ Failed to connect to Snowflake: {e}")
+        sys.exit(1)
     
     # Step 2: Find CSV files and upload to Snowflake
     print()
     print("=" * 80)
     print("Step 2: Finding and uploading CSV files to Snowflake...")
     print("=" * 80)
+    print(f"✅ Connected to Snowflake account: {config['account']}")
     
     csv_files = find_csv_files()
     
     if not csv_files:
+        if not persistent_connection:
+            conn.close()
         print("❌ No CSV files found matching pattern '*_matches.csv'")
         print("   Expected files like: UCL_champions_league_matches.csv")
         print(f"   Searched in: {Path.cwd()}")
@@ -187,54 +440,86 @@ def main():
     
     print(f"✅ Found {len(csv_files)} CSV file(s):")
     for csv_file in csv_files:
-        file_size = os.path.getsize(csv_file)
-        print(f"   - {csv_file} ({file_size:,} bytes)")
+        print(f"   - {csv_file.path} ({csv_file.size:,} bytes)")
     
-    # Connect to Snowflake
-    try:
-        conn = connect_to_snowflake(config)
-    except Exception as e:
-        print(f"\n❌ Failed to connect to Snowflake: {e}")
-        sys.exit(1)
+    # Upload and loader threads each take their own connection from the pool
+    pool = ConnectionPool(config, conn, pool_size)
     
     try:
-        # Check existing files and upload
-        print()
-        print("Checking stage for existing files...")
-        list_stage_files(
-            conn,
-            stage_name,
-            config.get("database"),
-            config.get("schema")
-        )
+        # The stage was already listed in the background while the scraper ran
+        if existing_files is not None:
+            print()
+            print(f"📁 {len(existing_files)} match file(s) already in stage '{stage_name}'")
         
         print()
         print("Uploading CSV files to Snowflake stage...")
         
-        skip_existing = config.get("skip_existing_files", True)
         uploaded_count = 0
         skipped_count = 0
         
-        for csv_file in csv_files:
-            # Check if file exists before uploading
-            filename = os.path.basename(csv_file)
-            if skip_existing and check_file_exists_in_stage(
-                conn, filename, stage_name, 
-                config.get("database"), config.get("schema")
-            ):
+        # OVERWRITE=TRUE skips PUT's own digest check against the stage. Files already in the
+        # stage are filtered out below, so PUT only has to check itself when the listing failed
+        overwrite = not skip_existing or existing_files is not None
+        
+        files_to_upload = []
+        for csv_file, filename, _ in csv_files:
+            # Check if file exists before uploading (PUT stores it gzipped as <name>.gz)
+            if existing_files is not None and (filename in existing_files or f"{filename}.gz" in existing_files):
                 print(f"   ⏭️  Skipping {filename} (already in stage)")
                 skipped_count += 1
                 continue
             
-            if upload_file_to_stage(
-                conn,
-                csv_file,
-                stage_name,
-                config.get("database"),
-                config.get("schema"),
-                skip_existing=skip_existing
-            ):
-                uploaded_count += 1
+            files_to_upload.append(csv_file)
+        
+        # Upload the remaining files in batches (one PUT per batch), up to
+        # upload_parallel batches at once. When loading to tables, each uploaded
+        # batch is loaded on a worker thread as soon as its PUT finishes, with up
+        # to copy_parallel loads at once.
+        # Batches only exist to overlap uploads with loads; otherwise one wildcard PUT uploads everything
+        upload_batch_size = batch_size if load_to_tables else max(1, len(files_to_upload))
+        upload_batches = [
+            files_to_upload[start:start + upload_batch_size]
+            for start in range(0, len(files_to_upload), upload_batch_size)
+        ]
+        load_futures = []
+        with ThreadPoolExecutor(max_workers=copy_parallel) as load_executor, \
+                ThreadPoolExecutor(max_workers=max(1, min(upload_parallel, len(upload_batches)))) as upload_executor:
+            # Check the load procedures exist while the first batches upload. This uses the
+            # main connection without taking it from the pool, so the first batch doesn't
+            # have to open a second connection
+            procedures_check = None
+            if load_to_tables:
+                procedures_check = load_executor.submit(verify_load_procedures, conn, config)
+            
+            upload_futures = [
+                upload_executor.submit(
+                    pool.run_with_cursor,
+                    upload_files_to_stage_bulk,
+                    batch,
+                    stage_name,
+                    database,
+                    schema,
+                    parallel=put_parallel,
+                    overwrite=overwrite,
+                    pre_gzip=pre_gzip
+                )
+                for batch in upload_batches
+            ]
+            
+            for future in as_completed(upload_futures):
+                uploaded_files, put_skipped_files = future.result()
+                uploaded_count += len(uploaded_files)
+                skipped_count += len(put_skipped_files)
+                
+                if load_to_tables and uploaded_files and LOAD_FILES_PROCEDURE in procedures_check.result():
+                    # A single COPY accepts at most MAX_COPY_FILES file names
+                    for chunk_start in range(0, len(uploaded_files), MAX_COPY_FILES):
+                        load_futures.append(load_executor.submit(
+                            pool.run,
+                            load_files_to_tables,
+                            config,
+                            uploaded_files[chunk_start:chunk_start + MAX_COPY_FILES]
+                        ))
         
         print()
         print(f"✅ Successfully uploaded {uploaded_count} new file(s)")
@@ -242,17 +527,61 @@ def main():
             print(f"⏭️  Skipped {skipped_count} existing file(s)")
         print(f"📊 Total files processed: {len(csv_files)}")
         
-        # List stage files after upload
-        list_stage_files(
-            conn,
-            stage_name,
-            config.get("database"),
-            config.get("schema")
-        )
+        # Only list this run's files, not the whole stage
+        listing_pattern = ".*(" + "|".join(
+            csv_file.name.replace(".", "[.]") for csv_file in csv_files
+        ) + ").*"
+        
+        def show_stage_files():
+            list_stage_files(
+                conn,
+                stage_name,
+                database,
+                schema,
+                pattern=listing_pattern,
+                cursor=pool.cursor(conn)
+            )
+        
+        # Reload everything when nothing new was loaded incrementally (no new files,
+        # or LOAD_MATCHES_FROM_FILES is missing)
+        full_reload = (load_to_tables and not load_futures
+                       and LOAD_ALL_PROCEDURE in procedures_check.result())
+        
+        # Optionally list stage files after upload (unless it can overlap the full reload below)
+        if verify_listing and not full_reload:
+            show_stage_files()
         
         # Step 3: Optionally load data from stage to tables
-        if load_to_tables:
-            load_data_to_tables(conn, config)
+        if load_futures:
+            print()
+            print("=" * 80)
+            print("Step 3: Loading uploaded files from stage to tables...")
+            print("=" * 80)
+            
+            rows_loaded = 0
+            failed_batches = 0
+            for future in load_futures:
+                try:
+                    rows_loaded += future.result()
+                except Exception as e:
+                    print(f"\n❌ Error loading batch to tables: {e}")
+                    failed_batches += 1
+            
+            print()
+            print(f"📊 Total rows loaded: {rows_loaded:,}")
+            if failed_batches:
+                print(f"⚠️  {failed_batches} batch(es) failed to load, check EUROPEAN_CLUB_CUPS_LOAD_LOG")
+        elif full_reload:
+            # Reload the table from the files in stage
+            # (and list the stage while the procedure runs, if enabled)
+            load_data_to_tables(
+                conn,
+                config,
+                while_waiting=show_stage_files if verify_listing else None
+            )
+        elif load_to_tables:
+            print()
+            print(f"⚠️  Skipping data load to tables ({LOAD_ALL_PROCEDURE} is missing)")
         else:
             print()
             print("ℹ️  Skipping data load to tables (load_to_tables=false in config)")
@@ -264,18 +593,24 @@ def main():
         print("=" * 80)
         
     finally:
-        conn.close()
-        print("\n🔌 Disconnected from Snowflake")
+        pool.close()
+        if not persistent_connection:
+            conn.close()
+            print("\n🔌 Disconnected from Snowflake")
 
 
 if __name__ == "__main__":
+    # Configure only this module's logger; the root logger would also print every library's records
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(log_handler)
+    log.propagate = False
+    
     try:
         main()
     except KeyboardInterrupt:
         print("\n\n⚠️  Process interrupted by user")
         sys.exit(1)
     except Exception as e:
-        print(f"\n❌ Fatal error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("\n❌ Fatal error: %s", e)
         sys.exit(1)